@@ -2,17 +2,28 @@ from shiny import App, ui, render, reactive           # Import PyShiny component
 from htmltools import HTML                            # For injecting raw HTML into the UI
 from shiny.ui import modal_show, modal, modal_button
 from htmltools import tags
-import json                                           # To load and inject the GeoJSON
+import orjson                                         # To load and serve the GeoJSON
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt                       # For the graphic
+from string import Template                           # For the map HTML
+from functools import lru_cache                       # For caching the scatter plots
+import base64
+import gzip
+import io
+from matplotlib.figure import Figure                  # For the graphic
+from starlette.applications import Starlette          # For serving the GeoJSON next to the app
+from starlette.responses import Response
+from starlette.routing import Mount, Route
 
 # Load raw GeoJSON
-with open("UCD_DeltaT.geojson", encoding="utf-8") as f:
-    original_geojson = json.load(f)
+with open("UCD_DeltaT.geojson", "rb") as f:
+    original_geojson = orjson.loads(f.read())
 
 # Load ΔT values for each country and season
 delta_df = pd.read_csv("UCD_DeltaT.csv")
 available_countries = sorted(delta_df["UC_NM_MN"].dropna().unique())
+# Row positions for each urban area (some names appear more than once)
+COUNTRY_ROWS = delta_df.groupby("UC_NM_MN").indices
 
 # Dropdown variables
 variable_labels = {
@@ -26,28 +37,104 @@ variable_labels = {
     "DeltaT_Fall_Night_mean": "Fall (Night)",
 }
 
-# Coloring function
-def get_color(value):
-    if value is None:
-        return "#cccccc"
-    elif value > 9:
-        return "#b35806"
-    elif value > 6:
-        return "#e08214"
-    elif value > 3:
-        return "#fdb863"
-    elif value > 0:
-        return "#fee0b6"
-    elif value == 0:
-        return "#f7f7f7"
-    elif value > -3:
-        return "#d8daeb"
-    elif value > -6:
-        return "#b2abd2"
-    elif value > -9:
-        return "#8073ac"
-    else:
-        return "#542788"
+# ΔT values are only plotted and binned, so float32 is plenty
+delta_df = delta_df.astype(dict.fromkeys(variable_labels, np.float32))
+
+# Day and night ΔT of every row as (rows, seasons) arrays for the scatter plot
+SEASONS = ["Winter", "Spring", "Summer", "Fall"]
+DAY_MAT = delta_df[[f"DeltaT_{s}_Day_mean" for s in SEASONS]].to_numpy(np.float32)
+NIGHT_MAT = delta_df[[f"DeltaT_{s}_Night_mean" for s in SEASONS]].to_numpy(np.float32)
+
+# Coloring function: ΔT bins are right-closed, e.g. (3, 6] -> "#fdb863"
+# Features carry an index into PALETTE, which the browser expands to the hex color
+EDGES = np.array([-9, -6, -3, 0, 3, 6, 9])
+PALETTE = ["#542788", "#8073ac", "#b2abd2", "#d8daeb", "#fee0b6", "#fdb863", "#e08214", "#b35806", "#f7f7f7", "#cccccc"]
+ZERO_INDEX, MISSING_INDEX = 8, 9
+PALETTE_JSON = orjson.dumps(PALETTE).decode()
+
+def get_color_indices(values):
+    values = np.asarray(values, dtype=float)
+    indices = np.digitize(values, EDGES, right=True).astype(np.uint8)
+    indices[values == 0] = ZERO_INDEX
+    indices[np.isnan(values)] = MISSING_INDEX
+    return indices
+
+# ΔT values per variable in feature order (NaN where missing)
+features = original_geojson["features"]
+VALUES = {
+    var: np.array([f["properties"].get(var, np.nan) for f in features], dtype=np.float32)
+    for var in variable_labels
+}
+
+# Palette index of every feature per variable, one digit per feature id (missing values are gray)
+COLOR_INDICES = {
+    var: "".join(map(str, get_color_indices(VALUES[var])))
+    for var in variable_labels
+}
+
+# Round the polygon coordinates; the source has far more precision than the map can show
+COORD_DECIMALS = 4                                    # About 10 m
+
+def quantize_geometry(geometry):
+    polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+    polygons = [[np.round(ring, COORD_DECIMALS).tolist() for ring in polygon] for polygon in polygons]
+    return {
+        "type": geometry["type"],
+        "coordinates": polygons if geometry["type"] == "MultiPolygon" else polygons[0],
+    }
+
+# Bounding box [west, south, east, north] of a (Multi)Polygon
+def get_bbox(geometry):
+    polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+    points = np.array([point[:2] for polygon in polygons for ring in polygon for point in ring])
+    return points.min(axis=0).tolist() + points.max(axis=0).tolist()
+
+# The polygons are sent to the browser once and recolored by id when the variable changes;
+# their bounding boxes let the browser draw only the ones inside the current view
+for i, feature in enumerate(features):
+    feature["id"] = i
+    feature["geometry"] = quantize_geometry(feature["geometry"])
+    feature["bbox"] = get_bbox(feature["geometry"])
+GEOJSON = orjson.dumps(original_geojson)
+GEOJSON_GZIP = gzip.compress(GEOJSON, compresslevel=6)
+
+# Drawing polygon outlines dominates rendering for large layers, so the map only
+# outlines the polygons while at most this many are in view
+MAX_STROKED_FEATURES = 10000
+
+# Scatter plot figure, reused across renders: only the points, labels and title change
+SCATTER_WIDTH, SCATTER_HEIGHT = 960, 480              # Base size in CSS pixels, scaled to the card width
+FIG = Figure(figsize=(SCATTER_WIDTH / 100, SCATTER_HEIGHT / 100), dpi=100, layout="tight")
+AX = FIG.subplots()
+SCATTER = AX.scatter([], [], color="darkorange", s=80)
+SEASON_LABELS = [AX.text(0, 0, season, fontsize=10) for season in SEASONS]
+AX.set_xlabel("ΔT (Day) °C")
+AX.set_ylabel("ΔT (Night) °C")
+AX.grid(True)
+AX.axhline(0, color="gray", linestyle="--", linewidth=0.7)
+AX.axvline(0, color="gray", linestyle="--", linewidth=0.7)
+
+# The plot only depends on the urban area, so keep the PNGs of recently shown ones
+@lru_cache(maxsize=512)
+def render_scatter(country):
+    rows = COUNTRY_ROWS[country]
+    day_values = DAY_MAT[rows].flatten()
+    night_values = NIGHT_MAT[rows].flatten()
+
+    SCATTER.set_offsets(np.column_stack([day_values, night_values]))
+    for label, x, y in zip(SEASON_LABELS, day_values, night_values):
+        label.set_position((x + 0.1, y))
+    AX.set_title(f"ΔT: Day vs Night ({country})")
+
+    # Older Matplotlib leaves collections out of relim(), so add the points explicitly
+    AX.relim()
+    AX.update_datalim(SCATTER.get_offsets())
+    AX.autoscale_view()
+
+    # Rendered at twice the display size to stay sharp on high-density screens
+    with io.BytesIO() as buf:
+        FIG.savefig(buf, format="png", dpi=2 * FIG.dpi)
+        return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
 
 # UI layout
 app_ui = ui.page_navbar(
@@ -71,7 +158,7 @@ app_ui = ui.page_navbar(
         ui.card(
             ui.card_header("Average ΔT: Day vs Night by Season"),
             ui.input_select("country", "Select a country/urban area:", available_countries, selected="Karlsruhe [DEU]"),
-            ui.output_plot("scatterchart"),
+            ui.output_ui("scatterchart"),
             ),
     ),
     fillable="Urban Heatmap",
@@ -80,150 +167,114 @@ app_ui = ui.page_navbar(
     window_title="Urban Heatmap App"
 )
 
-# Text in the Beginning
-def info_modal():
-    modal_show(
-        modal(
-            tags.strong(tags.h3("🌍 Urban Heatmap Application")),
-            tags.p(
-                "Exploring the Difference of Surface Temperature Anomalies (ΔT) in Every Country!"
-            ),
-            tags.hr(),
-            tags.strong(tags.h4("📖 About The Application")),
-            tags.p(
-                """
-            This application provides information about the variety of Surface
-            Temperature Anomalies (ΔT) for every season (winter, spring, summer,
-            fall) seen in day and night for every country around the world.
-            """,
-            style="""
-            text-align: justify;
-            word-break:break-word;
-            hyphens: auto;
-            """,
-            ),
-            tags.p(
-                """
-            The first tab (🗺️ Urban Heatmap) will provide you with the heatmap and the heat value when
-            you click the polygon for each country.
-            """,
-            style="""
-            text-align: justify;
-            word-break:break-word;
-            hyphens: auto;
-            """,
-            ),
-            tags.p(
-                """
-            The second tab (📊 ΔT Scatter Plot) will provide you the graphic for seasonal and diurnal
-            variations for every country based on its annual mean temperature
-            anomalies from each season in night (x-value) and day (y-value) conditions.
-            """,  
-            style="""
-            text-align: justify;
-            word-break:break-word;
-            hyphens: auto;
-            """,
-            ),
-            tags.hr(),
-            tags.strong(tags.h4("📖 Reference Study")),
-            tags.p(
-            """
-            Susanne A Benz et al 2021 Environ. Res. Lett. 16 064093
-            """,
-            style="""
-            text-align: justify;
-            word-break:break-word;
-            hyphens: auto;
-            """,
-            ),
-            tags.a(
-                "https://doi.org/10.1088/1748-9326/ac0661",
-                href=("https://doi.org/10.1088/1748-9326/ac0661"
-            ),
-            style="""
-            text-align: justify;
-            word-break:break-word;
-            hyphens: auto;
-            """,
-            ), 
-            tags.hr(),
-            tags.strong(tags.h4("📧 Contact")),
-            tags.a(
-                "Susanne A Benz", href=("mailto:susanne.benz@kit.edu"),
-            style="""
-            text-align: justify;
-            word-break:break-word;
-            hyphens: auto;
-            """,
-            ),
-            tags.p(
-            """
-            """,
-            style="""
-            text-align: justify;
-            word-break:break-word;
-            hyphens: auto;
-            """,
-            ),
-            tags.a(
-                "Rania A Desenaldo", href=("mailto:raniadesenaldo@gmail.com"),
-            style="""
-            text-align: justify;
-            word-break:break-word;
-            hyphens: auto;
-            """,
-            ),            
-            size="l",
-            easy_close=True,
-            footer=modal_button("Close"),
-        )
-    )
-
-# SERVER
-def server(input, output, session):
-
-    info_modal()
-
-    @reactive.Effect
-    @reactive.event(input.info_icon)
-    def _():
-        info_modal()
-
-    @reactive.calc
-    def geojson_colored():
-        geojson = json.loads(json.dumps(original_geojson))
-        selected_var = input.selected_variable()
-
-        values = [
-            f["properties"].get(selected_var, 0)
-            for f in geojson["features"]
-            if f["properties"].get(selected_var) is not None
-        ]
-
-        if not values:
-            min_val, max_val = 0, 1
-        else:
-            min_val, max_val = min(values), max(values)
-
-        for feature in geojson["features"]:
-            val = feature["properties"].get(selected_var, 0)
-            color = get_color(val if val is not None else 0)
-            feature["properties"]["color"] = color
+# Text in the Beginning, built once and shown to every session
+INFO_MODAL = modal(
+    tags.strong(tags.h3("🌍 Urban Heatmap Application")),
+    tags.p(
+        "Exploring the Difference of Surface Temperature Anomalies (ΔT) in Every Country!"
+    ),
+    tags.hr(),
+    tags.strong(tags.h4("📖 About The Application")),
+    tags.p(
+        """
+    This application provides information about the variety of Surface
+    Temperature Anomalies (ΔT) for every season (winter, spring, summer,
+    fall) seen in day and night for every country around the world.
+    """,
+    style="""
+    text-align: justify;
+    word-break:break-word;
+    hyphens: auto;
+    """,
+    ),
+    tags.p(
+        """
+    The first tab (🗺️ Urban Heatmap) will provide you with the heatmap and the heat value when
+    you click the polygon for each country.
+    """,
+    style="""
+    text-align: justify;
+    word-break:break-word;
+    hyphens: auto;
+    """,
+    ),
+    tags.p(
+        """
+    The second tab (📊 ΔT Scatter Plot) will provide you the graphic for seasonal and diurnal
+    variations for every country based on its annual mean temperature
+    anomalies from each season in night (x-value) and day (y-value) conditions.
+    """,  
+    style="""
+    text-align: justify;
+    word-break:break-word;
+    hyphens: auto;
+    """,
+    ),
+    tags.hr(),
+    tags.strong(tags.h4("📖 Reference Study")),
+    tags.p(
+    """
+    Susanne A Benz et al 2021 Environ. Res. Lett. 16 064093
+    """,
+    style="""
+    text-align: justify;
+    word-break:break-word;
+    hyphens: auto;
+    """,
+    ),
+    tags.a(
+        "https://doi.org/10.1088/1748-9326/ac0661",
+        href=("https://doi.org/10.1088/1748-9326/ac0661"
+    ),
+    style="""
+    text-align: justify;
+    word-break:break-word;
+    hyphens: auto;
+    """,
+    ), 
+    tags.hr(),
+    tags.strong(tags.h4("📧 Contact")),
+    tags.a(
+        "Susanne A Benz", href=("mailto:susanne.benz@kit.edu"),
+    style="""
+    text-align: justify;
+    word-break:break-word;
+    hyphens: auto;
+    """,
+    ),
+    tags.p(
+    """
+    """,
+    style="""
+    text-align: justify;
+    word-break:break-word;
+    hyphens: auto;
+    """,
+    ),
+    tags.a(
+        "Rania A Desenaldo", href=("mailto:raniadesenaldo@gmail.com"),
+    style="""
+    text-align: justify;
+    word-break:break-word;
+    hyphens: auto;
+    """,
+    ),            
+    size="l",
+    easy_close=True,
+    footer=modal_button("Close"),
+)
 
-        return json.dumps(geojson)
+def info_modal():
+    modal_show(INFO_MODAL)
 
-    @output
-    @render.ui
-    def mymap():
-        # Return HTML and JavaScript as raw HTML to the frontend
-        return HTML(f"""
+# Leaflet map, filled in with the initial variable of each session
+MAP_TEMPLATE = Template("""
         <!-- Load Leaflet CSS -->
         <link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" />
                          
         <!-- Custom styles for legend -->
         <style>
-        .legend {{
+        .legend {
             background: white;
             padding: 10px;
             line-height: 18px;
@@ -231,20 +282,20 @@ def server(input, output, session):
             font-family: sans-serif;
             border-radius: 5px;
             box-shadow: 0 0 15px rgba(0,0,0,0.2);
-        }}
-        .legend i {{
+        }
+        .legend i {
             display: inline-block;
             width: 18px;
             height: 18px;
             float: left;
             margin-right: 8px;
             opacity: 0.8;
-        }}
+        }
         </style>            
 
         <!-- Info box style -->
         <style>
-          .info-box {{
+          .info-box {
             position: absolute;
             top: 60px;
             right: 20px;
@@ -254,7 +305,7 @@ def server(input, output, session):
             box-shadow: 0 0 15px rgba(0,0,0,0.2);
             z-index: 1000;
             font-family: sans-serif;
-          }}
+          }
         </style>
 
         <!-- Map container (required for Leaflet) -->
@@ -270,97 +321,227 @@ def server(input, output, session):
         
         <!-- JavaScript for initializing the map -->
         <script>
-            setTimeout(function() {{
+            setTimeout(function() {
                 // Create the Leaflet map and center it
                 var map = L.map('map').setView([49.3, 8.45], 9);
 
                 // Add OpenStreetMap tile layer
-                L.tileLayer('https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
+                L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
                     maxZoom: 19,
                     attribution: '&copy; OpenStreetMap contributors'
-                }}).addTo(map);
+                }).addTo(map);
 
-                // Use the Python-injected GeoJSON
-                var geojson = {geojson_colored()};
+                var selectedVar = "${selected_var}";
+                var PALETTE = ${palette};
+                var colorIndices = "${color_indices}";
+                var MAX_STROKED_FEATURES = ${max_stroked_features};
+                var stroked = true;
+
+                function featureColor(feature) {
+                    return PALETTE[colorIndices.charAt(feature.id)];
+                }
 
                 // POPUP
-                function myClick(feature, layer) {{
-                    layer.on('click', function(e) {{
+                function myClick(feature, layer) {
+                    layer.on('click', function(e) {
                         var props = feature.properties;
-                        var val = props["{input.selected_variable()}"];
+                        var val = props[selectedVar];
                         var formattedVal = (val !== null && val !== undefined) ? val.toFixed(3) : "N/A";
                         var popup = "<b>Region:</b> " + props.UC_NM_MN + "<br>" +
                             "<b>ΔT Value:</b> " + formattedVal + "°C";
                         layer.bindPopup(popup).openPopup();
-                    }});
-                }}
-
-                L.geoJSON(geojson, {{
-                    onEachFeature: myClick,
-                    style: function(feature) {{
-                        return {{
-                            color: feature.properties.color,
+                    });
+                }
+
+                // Leaflet layer of every feature currently drawn, by id
+                var shown = {};
+
+                var layer = L.geoJSON(null, {
+                    onEachFeature: function(feature, featureLayer) {
+                        shown[feature.id] = featureLayer;
+                        myClick(feature, featureLayer);
+                    },
+                    style: function(feature) {
+                        return {
+                            color: featureColor(feature),
+                            stroke: stroked,
                             weight: 2,
                             fillOpacity: 0.7
-                        }};
-                    }}
-                }}).addTo(map);
+                        };
+                    }
+                }).addTo(map);
+
+                // Grid of CELL_SIZE degree cells listing the features whose bbox overlaps each cell
+                var CELL_SIZE = 10;
+                var grid = {};
+
+                function eachCell(west, south, east, north, callback) {
+                    for (var x = Math.floor(west / CELL_SIZE); x <= Math.floor(east / CELL_SIZE); x++) {
+                        for (var y = Math.floor(south / CELL_SIZE); y <= Math.floor(north / CELL_SIZE); y++) {
+                            callback(x + "," + y);
+                        }
+                    }
+                }
+
+                // Draw only the features inside the current view
+                function showVisible() {
+                    var bounds = map.getBounds();
+                    var west = Math.max(bounds.getWest(), -180), east = Math.min(bounds.getEast(), 180);
+                    var south = bounds.getSouth(), north = bounds.getNorth();
+
+                    var visible = {};
+                    eachCell(west, south, east, north, function(key) {
+                        (grid[key] || []).forEach(function(feature) {
+                            var bbox = feature.bbox;
+                            if (bbox[0] <= east && bbox[2] >= west && bbox[1] <= north && bbox[3] >= south) {
+                                visible[feature.id] = feature;
+                            }
+                        });
+                    });
+
+                    // Outline the polygons only when few enough are in view
+                    var stroke = Object.keys(visible).length <= MAX_STROKED_FEATURES;
+
+                    Object.keys(shown).forEach(function(id) {
+                        if (visible[id]) {
+                            delete visible[id];
+                        } else {
+                            layer.removeLayer(shown[id]);
+                            delete shown[id];
+                        }
+                    });
+                    if (stroke !== stroked) {
+                        stroked = stroke;
+                        layer.setStyle({ stroke: stroked });
+                    }
+                    Object.keys(visible).forEach(function(id) {
+                        layer.addData(visible[id]);
+                    });
+                }
+
+                // Load the polygons once; later variable changes only restyle them
+                fetch("geojson")
+                    .then(function(response) { return response.json(); })
+                    .then(function(data) {
+                        data.features.forEach(function(feature) {
+                            var bbox = feature.bbox;
+                            eachCell(bbox[0], bbox[1], bbox[2], bbox[3], function(key) {
+                                (grid[key] = grid[key] || []).push(feature);
+                            });
+                        });
+                        showVisible();
+                        map.on("moveend", showVisible);
+                    });
+
+                Shiny.addCustomMessageHandler("recolor", function(message) {
+                    selectedVar = message.variable;
+                    colorIndices = message.colorIndices;
+                    layer.eachLayer(function(l) {
+                        l.setStyle({ color: featureColor(l.feature) });
+                    });
+                });
 
         // Add legend
-        var legend = L.control({{ position: "bottomleft" }});
-        legend.onAdd = function(map) {{
+        var legend = L.control({ position: "bottomleft" });
+        legend.onAdd = function(map) {
             var div = L.DomUtil.create("div", "info legend");
-            var grades = ["> 9", "> 6", "> 3", "> 0", "= 0", "< 0", "< -3", "< -6", "< -9"];
+            var grades = ["> 9", "> 6", "> 3", "> 0", "= 0", "< 0", "< -3", "< -6", "< -9", "No data"];
             var colors = [
                 "#b35806", "#e08214", "#fdb863", "#fee0b6",
-                "#f7f7f7", "#d8daeb", "#b2abd2", "#8073ac", "#542788"
+                "#f7f7f7", "#d8daeb", "#b2abd2", "#8073ac", "#542788", "#cccccc"
             ];
 
             div.innerHTML = "<b>Temp. Anomalies (°C)</b><br>";
-            for (var i = 0; i < grades.length; i++) {{
+            for (var i = 0; i < grades.length; i++) {
                 div.innerHTML +=
                     '<i style="background:' + colors[i] + ';"></i> ' +
                     grades[i] + '<br>';
-            }}
+            }
             return div;
-        }};
+        };
         legend.addTo(map);    
             
-            }}, 100);
+            }, 100);
 
         </script>
-        """)
+""")
 
-    @reactive.calc
-    def selected_country_data():
-        selected_country = input.country()
-        country_data = delta_df[delta_df["UC_NM_MN"] == selected_country]
-        return country_data
+# SERVER
+def server(input, output, session):
+
+    info_modal()
+
+    @reactive.Effect
+    @reactive.event(input.info_icon)
+    def _():
+        info_modal()
+
+    # The map is only built once; switching variables just sends the new colors
+    @reactive.Effect
+    @reactive.event(input.selected_variable, ignore_init=True)
+    async def _():
+        selected_var = input.selected_variable()
+        await session.send_custom_message(
+            "recolor", {"variable": selected_var, "colorIndices": COLOR_INDICES[selected_var]}
+        )
 
     @output
-    @render.plot
-    def scatterchart():
-        df = selected_country_data()
-        seasons = ["Winter", "Spring", "Summer", "Fall"]
-        day_cols = [f"DeltaT_{s}_Day_mean" for s in seasons]
-        night_cols = [f"DeltaT_{s}_Night_mean" for s in seasons]
+    @render.ui
+    def mymap():
+        with reactive.isolate():
+            selected_var = input.selected_variable()
 
-        day_values = df[day_cols].values.flatten()
-        night_values = df[night_cols].values.flatten()
+        # Return HTML and JavaScript as raw HTML to the frontend
+        return HTML(MAP_TEMPLATE.substitute(
+            selected_var=selected_var,
+            palette=PALETTE_JSON,
+            color_indices=COLOR_INDICES[selected_var],
+            max_stroked_features=MAX_STROKED_FEATURES,
+        ))
 
-        fig, ax = plt.subplots()
-        ax.scatter(day_values, night_values, color="darkorange", s=80)
+    @reactive.calc
+    def scatter_src():
+        return render_scatter(input.country())
 
-        for i, season in enumerate(seasons):
-            ax.text(day_values[i] + 0.1, night_values[i], season, fontsize=10)
+    @output
+    @render.ui
+    def scatterchart():
+        return tags.img(
+            src=scatter_src(),
+            width=SCATTER_WIDTH,
+            height=SCATTER_HEIGHT,
+            style="width: 100%; height: auto;",
+        )
 
-        ax.set_xlabel("ΔT (Day) °C")
-        ax.set_ylabel("ΔT (Night) °C")
-        ax.set_title(f"ΔT: Day vs Night ({input.country()})")
-        ax.grid(True)
-        ax.axhline(0, color="gray", linestyle="--", linewidth=0.7)
-        ax.axvline(0, color="gray", linestyle="--", linewidth=0.7)
-        return fig
+# Whether an Accept-Encoding header allows gzip, e.g. "gzip;q=0, identity" does not
+def accepts_gzip(accept_encoding):
+    qualities = {}
+    for item in accept_encoding.lower().split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            qualities[coding] = q
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+# Serve the serialized GeoJSON, gzipped for clients that accept it
+def geojson_route(request):
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        return Response(
+            GEOJSON_GZIP,
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+    return Response(GEOJSON, media_type="application/json", headers={"Vary": "Accept-Encoding"})
 
 # Start the app
-app = App(app_ui, server)
\ No newline at end of file
+app = Starlette(routes=[
+    Route("/geojson", geojson_route),
+    Mount("/", app=App(app_ui, server)),
+])
\ No newline at end of file